@@ -1,3 +1,40 @@
+import argparse
+import os
 import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the WAPI server.")
+    parser.add_argument("--prod", action="store_true", help="Run multiple workers without auto-reload")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--graceful-timeout", type=int, default=30, help="Seconds to drain in-flight requests on shutdown")
+    parser.add_argument("--shutdown-delay", type=float, default=5, help="Seconds /ready reports 503 after SIGTERM before draining starts")
+    args = parser.parse_args()
+
+    if not args.prod:
+        # Development: create the schema and auto-reload on code changes
+        from wapi.migrate import migrate
+        migrate()
+        uvicorn.run("wapi.main:app", host=args.host, port=args.port, reload=True)
+        return
+
+    # Production: schema changes are applied separately with `python -m wapi.migrate`
+    # Workers read this through Settings; the reloader also uses SIGTERM, so
+    # the delay is only applied in production mode
+    os.environ["SHUTDOWN_DELAY_SECONDS"] = str(args.shutdown_delay)
+    uvicorn.run(
+        "wapi.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="auto",  # uvloop when installed
+        http="httptools",
+        proxy_headers=True,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+
+
 if __name__ == "__main__":
-    uvicorn.run("wapi.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    main()
@@ -0,0 +1,15 @@
+import os
+
+# Settings() is read at import time; provide the required values so the
+# package can be imported without a .env file.
+for key, value in {
+    "DATABASE_HOSTNAME": "localhost",
+    "DATABASE_PORT": "5432",
+    "DATABASE_PASSWORD": "postgres",
+    "DATABASE_NAME": "wapi",
+    "DATABASE_USERNAME": "postgres",
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+}.items():
+    os.environ.setdefault(key, value)
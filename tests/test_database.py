@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from wapi import database
+from wapi.config import settings
+
+
+@pytest.fixture
+def make_replica(tmp_path):
+    """
+    Build a replica backed by a local SQLite database, standing in for a
+    second Postgres server.
+    """
+    def _make(name):
+        return database.Replica(f"sqlite:///{tmp_path / name}")
+    return _make
+
+
+@pytest.fixture(autouse=True)
+def no_background_probes(monkeypatch):
+    # Tests probe explicitly; keep check() from starting probe threads
+    monkeypatch.setattr(settings, "replica_health_interval_seconds", 3600.0)
+
+
+def use_replicas(monkeypatch, *replicas):
+    monkeypatch.setattr(database, "replicas", list(replicas))
+
+
+def test_round_robin_across_healthy_replicas(monkeypatch, make_replica):
+    first, second = make_replica("first.db"), make_replica("second.db")
+    first.probe()
+    second.probe()
+    use_replicas(monkeypatch, first, second)
+
+    picked = [database.get_read_engine() for _ in range(4)]
+
+    assert {picked[0], picked[1]} == {first.engine, second.engine}
+    assert picked[2:] == picked[:2]
+
+
+def test_unreachable_replica_falls_back_to_primary(monkeypatch, tmp_path):
+    replica = database.Replica(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    replica.probe()
+    use_replicas(monkeypatch, replica)
+
+    assert replica.healthy is False
+    assert database.get_read_engine() is database.engine
+
+
+def test_unreachable_replica_is_skipped(monkeypatch, tmp_path, make_replica):
+    healthy = make_replica("healthy.db")
+    dead = database.Replica(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    healthy.probe()
+    dead.probe()
+    use_replicas(monkeypatch, dead, healthy)
+
+    assert [database.get_read_engine() for _ in range(3)] == [healthy.engine] * 3
+
+
+def test_lagging_replica_falls_back_to_primary(monkeypatch, make_replica):
+    replica = make_replica("lagging.db")
+    monkeypatch.setattr(replica, "lag", lambda conn: settings.replica_max_lag_seconds + 1)
+    replica.probe()
+    use_replicas(monkeypatch, replica)
+
+    assert replica.healthy is False
+    assert database.get_read_engine() is database.engine
+
+
+def test_replica_within_lag_threshold_is_used(monkeypatch, make_replica):
+    replica = make_replica("caught_up.db")
+    monkeypatch.setattr(replica, "lag", lambda conn: settings.replica_max_lag_seconds - 1)
+    replica.probe()
+    use_replicas(monkeypatch, replica)
+
+    assert database.get_read_engine() is replica.engine
+
+
+def test_check_does_not_wait_for_running_probe(monkeypatch, make_replica):
+    replica = make_replica("busy.db")
+    replica.probe()
+    monkeypatch.setattr(settings, "replica_health_interval_seconds", 0.0)
+
+    # A probe is in flight: check() returns the last known state immediately
+    replica.lock.acquire()
+    try:
+        start = time.monotonic()
+        assert replica.check() is True
+        assert time.monotonic() - start < 0.1
+    finally:
+        replica.lock.release()
+
+
+def test_new_replica_is_not_used_before_first_probe(monkeypatch, make_replica):
+    replica = make_replica("fresh.db")
+    use_replicas(monkeypatch, replica)
+
+    assert database.get_read_engine() is database.engine
@@ -0,0 +1,31 @@
+from fastapi.testclient import TestClient
+
+from wapi import main
+
+
+def test_not_ready_while_primary_warm_up_fails(monkeypatch):
+    monkeypatch.setattr(main, "warm_up", lambda: False)
+    monkeypatch.setattr(main.settings, "warmup_retry_seconds", 0.01)
+
+    with TestClient(main.app) as client:
+        assert client.get("/ready").status_code == 503
+
+
+def test_ready_once_warm_up_succeeds(monkeypatch):
+    attempts = iter([False, False, True])
+    monkeypatch.setattr(main, "warm_up", lambda: next(attempts))
+    monkeypatch.setattr(main.settings, "warmup_retry_seconds", 0.01)
+
+    with TestClient(main.app) as client:
+        for _ in range(100):
+            if client.get("/ready").status_code == 200:
+                break
+            client.portal.call(main.asyncio.sleep, 0.01)
+        assert client.get("/ready").json() == {"ready": True}
+
+
+def test_ready_after_successful_warm_up(monkeypatch):
+    monkeypatch.setattr(main, "warm_up", lambda: True)
+
+    with TestClient(main.app) as client:
+        assert client.get("/ready").status_code == 200
@@ -0,0 +1,76 @@
+import pytest
+from pydantic import ValidationError
+
+from wapi import ratelimit
+from wapi.config import Settings
+
+
+def test_zero_rate_override_blocks_key():
+    limiter = ratelimit.RateLimiter(1.0, 2, {"blocked": 0})
+
+    assert [limiter.check("blocked") for _ in range(3)] == [ratelimit.BLOCKED_RETRY_AFTER] * 3
+    assert limiter.check("other") == 0
+
+
+@pytest.mark.parametrize("field", ["ingest_rate_per_second", "ingest_burst", "read_rate_per_second", "read_burst"])
+def test_settings_reject_non_positive_limits(field):
+    with pytest.raises(ValidationError):
+        Settings(**{field: 0})
+
+
+def test_settings_reject_negative_override():
+    with pytest.raises(ValidationError):
+        Settings(ingest_rate_overrides={"key": -1})
+
+
+def test_new_keys_do_not_evict_throttled_bucket():
+    limiter = ratelimit.RateLimiter(0.001, 2, max_keys=3)
+    while not limiter.check("runaway"):
+        pass
+
+    for i in range(10):
+        limiter.check(f"junk-{i}")
+
+    assert limiter.check("runaway") > 0
+    assert len(limiter.buckets) <= 3
+
+
+def test_idle_buckets_are_evicted(monkeypatch):
+    limiter = ratelimit.RateLimiter(1.0, 2, max_keys=2)
+    limiter.check("a")
+    limiter.check("b")
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: 1e9)
+
+    limiter.check("c")
+
+    assert list(limiter.buckets) == ["b", "c"]
+
+
+def test_unverified_keys_share_one_bucket():
+    limiter = ratelimit.RateLimiter(1.0, 5, shared_rate=0.001, shared_burst=3, admit_new_keys=False)
+
+    results = [limiter.check(f"junk-{i}") for i in range(5)]
+
+    assert results[:3] == [0, 0, 0]
+    assert all(results[3:])
+    assert not limiter.buckets
+    assert limiter.stats()["by_key"] == {ratelimit.SHARED_KEY: 2}
+
+
+def test_admitted_key_gets_own_bucket():
+    limiter = ratelimit.RateLimiter(1.0, 5, shared_rate=0.001, shared_burst=1, admit_new_keys=False)
+    limiter.check("junk")
+    limiter.admit("station")
+
+    assert [limiter.check("station") for _ in range(5)] == [0] * 5
+
+
+def test_throttle_counters_are_bounded_by_buckets():
+    limiter = ratelimit.RateLimiter(0.001, 1, max_keys=2)
+    for i in range(20):
+        limiter.check(f"k{i}")
+        limiter.check(f"k{i}")
+
+    stats = limiter.stats()
+    assert set(stats["by_key"]) == {"k0", "k1", ratelimit.SHARED_KEY}
+    assert stats["throttled"] == sum(stats["by_key"].values())
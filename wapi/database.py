@@ -1,4 +1,7 @@
-from sqlalchemy import create_engine
+import itertools
+import threading
+import time
+from sqlalchemy import create_engine, make_url, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
@@ -17,4 +20,90 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+# # # READ REPLICAS
+
+# Seconds the replica is behind the primary, 0 when it has replayed all WAL
+# it received (or is not a standby at all)
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class Replica:
+    def __init__(self, url: str):
+        connect_args = {}
+        if make_url(url).get_backend_name() == "postgresql":
+            connect_args["connect_timeout"] = settings.replica_check_timeout_seconds
+        self.engine = create_engine(url, pool_pre_ping=True, connect_args=connect_args)
+        # Not used until the first probe has succeeded
+        self.healthy = False
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def lag(self, conn) -> float:
+        if self.engine.dialect.name != "postgresql":
+            conn.execute(text("SELECT 1"))
+            return 0.0
+        conn.execute(text(f"SET LOCAL statement_timeout = '{settings.replica_check_timeout_seconds}s'"))
+        return float(conn.execute(REPLICA_LAG_SQL).scalar() or 0)
+
+    def probe(self):
+        """
+        Connect and measure replication lag. Unreachable or lagging
+        replicas are marked unhealthy.
+        """
+        try:
+            with self.engine.connect() as conn:
+                self.healthy = self.lag(conn) <= settings.replica_max_lag_seconds
+        except Exception:
+            self.healthy = False
+        self.checked_at = time.monotonic()
+
+    def _probe_and_release(self):
+        try:
+            self.probe()
+        finally:
+            self.lock.release()
+
+    def check(self) -> bool:
+        """
+        Return the last known health state. If it is older than the
+        configured interval a probe is started in the background; requests
+        never wait for it, and no second probe starts while one is running.
+        """
+        if time.monotonic() - self.checked_at >= settings.replica_health_interval_seconds:
+            if self.lock.acquire(blocking=False):
+                threading.Thread(target=self._probe_and_release, daemon=True).start()
+        return self.healthy
+
+
+replicas = [Replica(url) for url in settings.database_replica_urls]
+_next_replica = itertools.count()
+
+
+def get_read_engine():
+    """
+    Pick the next healthy replica round-robin, falling back to the primary.
+    """
+    for _ in range(len(replicas)):
+        # next() on itertools.count is atomic under the GIL
+        replica = replicas[next(_next_replica) % len(replicas)]
+        if replica.check():
+            return replica.engine
+    return engine
+
+
+def get_read_db():
+    """
+    Session for read-only endpoints; may be served by a replica, so data
+    written moments ago on the primary might not be visible yet.
+    """
+    db = SessionLocal(bind=get_read_engine())
+    try:
+        yield db
+    finally:
+        db.close()
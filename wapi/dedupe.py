@@ -0,0 +1,36 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from . import schemas
+from .config import settings
+
+
+class DedupeWindow:
+    """
+    Remembers the response for the last `size` sequence numbers seen from
+    each station so replayed submissions are answered without a second
+    insert (the station's API key lookup still queries the database).
+    This is per-process; the (station_id, seq) unique constraint on the
+    data table catches anything that falls outside it.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.seen = {}
+        self.lock = threading.Lock()
+
+    def get(self, station_id: int, seq: int) -> Optional[schemas.DataIngestOut]:
+        with self.lock:
+            window = self.seen.get(station_id)
+            return window.get(seq) if window else None
+
+    def add(self, station_id: int, seq: int, result: schemas.DataIngestOut):
+        with self.lock:
+            window = self.seen.setdefault(station_id, OrderedDict())
+            window[seq] = result
+            if len(window) > self.size:
+                window.popitem(last=False)
+
+
+ingest_window = DedupeWindow(settings.dedupe_window)
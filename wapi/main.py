@@ -1,15 +1,115 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import signal
+import threading
+from fastapi import FastAPI, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from . import models
-from .database import engine
+from fastapi.responses import FileResponse, JSONResponse
+from sqlalchemy import text
+from .config import settings
+from .database import engine, replicas
 from .routers import user, auth, station
 import random
 
 
-models.Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+def _prime(eng) -> bool:
+    conns = []
+    try:
+        for _ in range(settings.warmup_connections):
+            conns.append(eng.connect())
+            conns[-1].execute(text("SELECT 1"))
+        return True
+    except Exception as e:
+        logger.warning("Warm-up could not connect to %s: %s", eng.url.render_as_string(hide_password=True), e)
+        return False
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+def warm_up() -> bool:
+    """
+    Prime the connection pools so the first requests after a (re)start
+    don't pay for opening connections. Returns whether the primary was
+    primed; replicas are best effort since reads fall back to the primary.
+    Schema creation is not done here, see `wapi.migrate`.
+    """
+    for replica in replicas:
+        _prime(replica.engine)
+    return _prime(engine)
+
+
+async def warm_up_until_ready(app: FastAPI):
+    """
+    Retry warm-up in the background until the primary is reachable, then
+    report ready. The worker keeps serving meanwhile, but /ready stays 503.
+    """
+    while not await run_in_threadpool(warm_up):
+        await asyncio.sleep(settings.warmup_retry_seconds)
+    if not app.state.draining:
+        app.state.ready = True
+        logger.info("Warm-up succeeded, worker is ready")
+
+
+def install_prestop_handler(app: FastAPI):
+    """
+    On SIGTERM, fail readiness first and only hand the signal to uvicorn
+    after `shutdown_delay_seconds`, so the load balancer sees /ready go 503
+    and stops routing here while the listener is still open. uvicorn then
+    closes the listener and drains in-flight requests. A second SIGTERM
+    is passed through immediately.
+
+    uvicorn installs its handlers before lifespan startup and restores the
+    originals on exit, so overriding SIGTERM here is safe.
+    """
+    delay = settings.shutdown_delay_seconds
+    if delay <= 0 or threading.current_thread() is not threading.main_thread():
+        return
+    uvicorn_handler = signal.getsignal(signal.SIGTERM)
+    if not callable(uvicorn_handler):
+        return
+
+    def on_sigterm(sig, frame):
+        was_ready = app.state.ready
+        app.state.ready = False
+        app.state.draining = True
+        if not was_ready:
+            # Not in rotation (still warming up, or already draining)
+            uvicorn_handler(sig, frame)
+            return
+        timer = threading.Timer(delay, uvicorn_handler, args=(sig, frame))
+        timer.daemon = True
+        timer.start()
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    app.state.draining = False
+    install_prestop_handler(app)
+    retry = None
+    if await run_in_threadpool(warm_up):
+        app.state.ready = True
+    else:
+        retry = asyncio.create_task(warm_up_until_ready(app))
+    yield
+    if retry:
+        retry.cancel()
+    engine.dispose()
+    for replica in replicas:
+        replica.engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 app.mount("/static", StaticFiles(directory="wapi/static"), name="static")
 app.include_router(user.router)
 app.include_router(auth.router)
@@ -20,3 +120,11 @@ app.include_router(station.router)
 def index():
     return FileResponse("wapi/templates/index.html", status_code=200)
 
+# Readiness probe: 200 once warm-up has primed the primary pool, 503 while
+# starting (or retrying warm-up) and after SIGTERM during the pre-stop delay
+@app.get("/ready", include_in_schema=False)
+def ready():
+    if not getattr(app.state, "ready", False):
+        return JSONResponse({"ready": False}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return {"ready": True}
+
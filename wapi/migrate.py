@@ -0,0 +1,23 @@
+from sqlalchemy import inspect, text
+from . import models
+from .database import engine
+
+
+def migrate():
+    """
+    Create missing tables and apply additive schema changes.
+    Run once per deploy (`python -m wapi.migrate`) rather than on app import.
+    """
+    models.Base.metadata.create_all(bind=engine)
+
+    # data.seq (client sequence number) was added after the table existed
+    columns = [c["name"] for c in inspect(engine).get_columns("data")]
+    if "seq" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE data ADD COLUMN seq BIGINT"))
+            conn.execute(text("ALTER TABLE data ADD CONSTRAINT uq_station_seq UNIQUE (station_id, seq)"))
+
+
+if __name__ == "__main__":
+    migrate()
+    print("Database schema is up to date.")
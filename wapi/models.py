@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, Sequence, JSON, UniqueConstraint
+from sqlalchemy import BigInteger, Boolean, Column, ForeignKey, Integer, String, Float, Sequence, JSON, UniqueConstraint
 from sqlalchemy.sql.expression import text
 from sqlalchemy.sql.sqltypes import TIMESTAMP
 from .database import Base
@@ -48,10 +48,14 @@ class Station(Base):
 # WEATHER DATA MODEL
 class Data(Base):
     __tablename__ = "data"
+    __table_args__ = (
+        UniqueConstraint('station_id', 'seq', name='uq_station_seq'),
+    )
 
     data_id = Column(Integer, primary_key=True, nullable=False)
     station_id = Column(Integer, ForeignKey("stations.station_id", ondelete="CASCADE"), nullable=False)
     location = Column(String, nullable=False)
+    seq = Column(BigInteger, nullable=True)
     
     temperature = Column(Float, nullable=False)
     pressure = Column(Float, nullable=False)
@@ -62,6 +66,23 @@ class Data(Base):
     is_raining = Column(Boolean, server_default='True', nullable=False)
     
     created_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'), nullable=False)
+
+
+# ROLLING PER-STATION STATISTICS (one row per station and metric)
+class StationStat(Base):
+    __tablename__ = "station_stats"
+
+    station_id = Column(Integer, ForeignKey("stations.station_id", ondelete="CASCADE"), primary_key=True, nullable=False)
+    metric = Column(String, primary_key=True, nullable=False)
+
+    count = Column(Integer, default=0, nullable=False)
+    mean = Column(Float, default=0, nullable=False)
+    var = Column(Float, default=0, nullable=False)
+    min = Column(Float, nullable=True)
+    max = Column(Float, nullable=True)
+    ewma = Column(Float, nullable=True)
+    trend = Column(Float, default=0, nullable=False)
+    anomalous = Column(Boolean, default=False, nullable=False)
 ###############################################################
 ##############################################################    
 
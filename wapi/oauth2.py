@@ -1,5 +1,6 @@
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from typing import Optional
 from fastapi.security import OAuth2PasswordBearer
 from . import schemas, models
 from sqlalchemy.orm import Session
@@ -9,6 +10,8 @@ from .config import settings
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='login')
+# Same scheme, but a missing Authorization header yields None instead of 401
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl='login', auto_error=False)
 
 
 SECRET_KEY = settings.secret_key
@@ -50,6 +53,13 @@ def get_current_user_optional(token: str = Depends(oauth2_scheme), db: Session =
     except Exception:
         return None
 
+def get_current_user_if_present(token: Optional[str] = Depends(oauth2_scheme_optional), db: Session = Depends(get_db)):
+    """
+    Like get_current_user_optional, but anonymous requests get None rather
+    than a 401 from the auto_error scheme.
+    """
+    return get_current_user_optional(token, db)
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     credential_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Could not validate credentials", headers={"www-Authenticate":"Bearer"})
     token_data = verify_access_token(token, credential_exception)
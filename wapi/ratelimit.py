@@ -0,0 +1,199 @@
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+from jose import JWTError, jwt
+
+from .config import settings
+from .oauth2 import SECRET_KEY, ALGORITHM
+
+
+# Retry-After sent to keys whose configured rate is 0 (blocked)
+BLOCKED_RETRY_AFTER = 60
+
+# Name the shared bucket is reported under in the throttle stats
+SHARED_KEY = "<shared>"
+
+
+class TokenBucket:
+    """
+    Classic token bucket: refills at `rate` tokens per second up to `burst`.
+    A rate of 0 never refills.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.throttled = 0
+
+    def is_full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+    def take(self) -> float:
+        """
+        Consume one token. Returns 0 on success, otherwise the number of
+        seconds until a token becomes available.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        if self.rate <= 0:
+            return BLOCKED_RETRY_AFTER
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    In-memory, per-process limiter holding one token bucket per key.
+
+    At most `max_keys` keys get their own bucket. To make room, only buckets
+    that have refilled completely (idle keys) are evicted, so a flood of new
+    keys cannot reset a throttled key. When no bucket can be evicted, or when
+    `admit_new_keys` is False and the key has not been `admit`ted by the
+    caller, the request is charged to one shared bucket instead. Keys with
+    an override always get their own bucket and are never evicted.
+    """
+
+    # How many least recently used buckets are scanned for an evictable one
+    EVICTION_SCAN = 64
+
+    def __init__(self, rate: float, burst: float, overrides: Optional[dict] = None, max_keys: int = 10000,
+                 shared_rate: Optional[float] = None, shared_burst: Optional[float] = None, admit_new_keys: bool = True):
+        self.rate = rate
+        self.burst = burst
+        self.overrides = overrides or {}
+        self.max_keys = max_keys
+        self.admit_new_keys = admit_new_keys
+        self.buckets = OrderedDict()
+        self.shared = TokenBucket(shared_rate or rate, shared_burst or burst)
+        self.throttled_total = 0
+        self.lock = threading.Lock()
+
+    def _new_bucket(self, key: str) -> TokenBucket:
+        rate = self.overrides.get(key, self.rate)
+        # A blocked key (rate 0) gets no burst either
+        return TokenBucket(rate, max(self.burst, rate) if rate > 0 else 0)
+
+    def _add_bucket(self, key: str) -> Optional[TokenBucket]:
+        """
+        Give `key` its own bucket, evicting an idle one if the table is full.
+        Returns None if there is no room.
+        """
+        if len(self.buckets) >= self.max_keys and key not in self.overrides:
+            now = time.monotonic()
+            idle = next(
+                (k for k, b in itertools.islice(self.buckets.items(), self.EVICTION_SCAN)
+                 if k not in self.overrides and b.is_full(now)),
+                None,
+            )
+            if idle is None:
+                return None
+            del self.buckets[idle]
+
+        bucket = self.buckets[key] = self._new_bucket(key)
+        return bucket
+
+    def admit(self, key: str):
+        """
+        Give a key the caller has verified its own bucket, if there is room.
+        """
+        with self.lock:
+            if key not in self.buckets:
+                self._add_bucket(key)
+
+    def check(self, key: str) -> float:
+        """
+        Returns 0 if the request for `key` is allowed, otherwise the
+        suggested retry delay in seconds.
+        """
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                self.buckets.move_to_end(key)
+            elif self.admit_new_keys or key in self.overrides:
+                bucket = self._add_bucket(key)
+            if bucket is None:
+                bucket = self.shared
+
+            wait = bucket.take()
+            if wait:
+                bucket.throttled += 1
+                self.throttled_total += 1
+            return wait
+
+    def stats(self) -> dict:
+        """
+        Total throttled count, plus per-key counts for keys that still have
+        a bucket (evicted keys drop out) and the shared bucket.
+        """
+        with self.lock:
+            by_key = {key: b.throttled for key, b in self.buckets.items() if b.throttled}
+            if self.shared.throttled:
+                by_key[SHARED_KEY] = self.shared.throttled
+            return {"throttled": self.throttled_total, "by_key": by_key}
+
+
+# Ingest keys are only admitted once authenticate_station has accepted them,
+# so unverified (possibly junk) keys share one bucket
+ingest_limiter = RateLimiter(
+    settings.ingest_rate_per_second,
+    settings.ingest_burst,
+    settings.ingest_rate_overrides,
+    shared_rate=settings.ingest_unverified_rate_per_second,
+    shared_burst=settings.ingest_unverified_burst,
+    admit_new_keys=False,
+)
+read_limiter = RateLimiter(settings.read_rate_per_second, settings.read_burst)
+
+
+def _throttle(limiter: RateLimiter, key: str):
+    wait = limiter.check(key)
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests. Please slow down.",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+
+def limit_ingest(api_key: str = Header(...)):
+    """
+    Throttle data submissions per station API key, before any DB access.
+    Keys seen for the first time share a bucket until they authenticate.
+    """
+    _throttle(ingest_limiter, api_key)
+
+
+def limit_reads(authorization: Optional[str] = Header(None)):
+    """
+    Throttle authenticated reads per user. The token is only decoded here;
+    requests without a valid token are left to the auth dependencies.
+    """
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return
+    try:
+        user_id = jwt.decode(authorization[7:], SECRET_KEY, algorithms=ALGORITHM).get("user_id")
+    except JWTError:
+        return
+    if user_id:
+        _throttle(read_limiter, str(user_id))
+
+
+def get_stats() -> dict:
+    """
+    Throttled request counters for this worker process.
+    """
+    ingest = ingest_limiter.stats()
+    # Don't echo full API keys back, a prefix is enough to identify the station
+    ingest["by_key"] = {key if key == SHARED_KEY else f"{key[:8]}...": count for key, count in ingest["by_key"].items()}
+    return {"ingest": ingest, "read": read_limiter.stats()}
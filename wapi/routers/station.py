@@ -1,14 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
 from typing import List, Optional
 from sqlalchemy import func
 from sqlalchemy.orm import Session
-from .. import models, schemas, oauth2
-from ..database import get_db
+from .. import models, schemas, oauth2, ratelimit, dedupe, stats
+from ..database import get_db, get_read_db
 import secrets, hashlib
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.exc import IntegrityError
 
 router = APIRouter(prefix="/stations", tags=['Weather Station'])
 
+# Response header carrying the incremental fetch cursor (last data_id seen)
+CURSOR_HEADER = "X-Data-Cursor"
+
+
+def _set_cursor(response: Response, data_points, since: Optional[int] = None):
+    """
+    Set the cursor header to the highest data_id returned, or echo back the
+    client's cursor when nothing newer was found.
+    """
+    cursor = max((d.data_id for d in data_points), default=since)
+    if cursor is not None:
+        response.headers[CURSOR_HEADER] = str(cursor)
+
+
+# Media type clients can send in Accept to request the column-oriented format
+COLUMNS_MEDIA_TYPE = "application/vnd.wapi.columns+json"
+DATA_FIELDS = ("wind_speed", "wind_direction", "temperature", "pressure", "humidity", "uv_index", "is_raining")
+
+
+def _epoch_ms(ts: datetime) -> int:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() * 1000)
+
+
+def _to_columns(data_points, delta: bool = False) -> schemas.DataColumns:
+    """
+    Convert data rows into one array per metric with epoch-ms timestamps.
+    """
+    timestamps = [_epoch_ms(d.created_at) for d in data_points]
+    if delta:
+        timestamps = timestamps[:1] + [b - a for a, b in zip(timestamps, timestamps[1:])]
+
+    columns = {field: [getattr(d, field) for d in data_points] for field in DATA_FIELDS}
+    return schemas.DataColumns(delta=delta, created_at=timestamps, **columns)
+
+
+def _render_data(data_points, response: Response, format: Optional[str], accept: Optional[str], delta: bool):
+    """
+    Return rows as-is (serialized through the route's response_model) unless
+    the column format was requested via `format` or the Accept header.
+    """
+    if format is None:
+        format = "columns" if accept and COLUMNS_MEDIA_TYPE in accept else "rows"
+    if format != "columns":
+        return data_points
+
+    return JSONResponse(
+        content=_to_columns(data_points, delta).model_dump(),
+        media_type=COLUMNS_MEDIA_TYPE,
+        headers=dict(response.headers),
+    )
+
 
 # # # STATION CRUD OPERATIONS
 
@@ -154,11 +209,11 @@ def delete_station(
     return
 
 # # GET STATION
-@router.get("/{station_id}/details", response_model=schemas.StationData)
+@router.get("/{station_id}/details", response_model=schemas.StationData, dependencies=[Depends(ratelimit.limit_reads)])
 def get_station_by_id(
     station_id: str,
     auth: schemas.User = Depends(oauth2.get_current_user_optional),  # User authentication (optional)
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
 
     # Query stations table by {station_id}
@@ -181,10 +236,10 @@ def get_station_by_id(
     return station
 
 # GET ALL STATIONS
-@router.get("/all",status_code=status.HTTP_200_OK , response_model=List[schemas.StationData])
+@router.get("/all",status_code=status.HTTP_200_OK , response_model=List[schemas.StationData], dependencies=[Depends(ratelimit.limit_reads)])
 def get_all_stations_data(
     auth: schemas.User = Depends(oauth2.get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     # skip: int = Query(0, ge=0, description="Number of records to skip for pagination"),
     # limit: int = Query(10, ge=1, le=100, description="Maximum number of records to return"),
     # location: Optional[str] = Query(None, description="Filter by station location"),
@@ -245,7 +300,7 @@ def get_all_stations_data(
     return stations
 
 @router.get("/public", response_model=List[schemas.PublicStationData])
-def get_public_stations(db: Session = Depends(get_db)):
+def get_public_stations(db: Session = Depends(get_read_db)):
     """
     Retrieve all public weather stations.
     """
@@ -253,17 +308,85 @@ def get_public_stations(db: Session = Depends(get_db)):
     return stations
 
 @router.get("/{station_id}/latest_metrics", response_model=List[schemas.DataOut])
-def get_latest_metrics(station_id: int, db: Session = Depends(get_db)):
+def get_latest_metrics(
+    station_id: int,
+    response: Response,
+    since: Optional[int] = Query(None, ge=0, description="Cursor (last data_id seen); returns nothing unless newer data exists"),
+    db: Session = Depends(get_read_db),
+):
     """
     Return the last two readings for the station for trend calculation.
+    If `since` is given and no reading is newer than it, an empty list is
+    returned so the client can keep its current trend.
     """
-    data_points = db.query(models.Data).filter(models.Data.station_id == station_id).order_by(models.Data.created_at.desc()).limit(2).all()
+    query = db.query(models.Data).filter(models.Data.station_id == station_id)
+    if since is not None:
+        newest = query.filter(models.Data.data_id > since).with_entities(models.Data.data_id).first()
+        if not newest:
+            _set_cursor(response, [], since)
+            return []
+
+    data_points = query.order_by(models.Data.created_at.desc(), models.Data.data_id.desc()).limit(2).all()
+    _set_cursor(response, data_points, since)
     return data_points
 
+# RATE LIMIT COUNTERS
+@router.get("/throttle_stats", status_code=status.HTTP_200_OK)
+def get_throttle_stats(auth: schemas.User = Depends(oauth2.get_current_user)):
+    """
+    Return counters of throttled requests for this worker (admins only).
+    """
+    if not auth.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required.")
+    return ratelimit.get_stats()
+
+# GET ROLLING STATION STATISTICS
+@router.get("/{station_id}/stats", response_model=schemas.StationStats, dependencies=[Depends(ratelimit.limit_reads)])
+def get_station_stats(
+    station_id: int,
+    auth: schemas.User = Depends(oauth2.get_current_user_if_present),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Return rolling mean/std, min/max, EWMA and trend per metric, maintained
+    at ingest time in the station_stats table.
+    """
+    station = db.query(models.Station).filter(models.Station.station_id == station_id).first()
+    if not station:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Station with ID '{station_id}' not found."
+        )
+
+    if not station.is_public:
+        if auth is None or (not getattr(auth, 'is_admin', False) and getattr(auth, 'username', None) != station.owner):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You are not authorized to access this station's data."
+            )
+
+    return stats.get_station_summary(db, station_id)
+
 # # # DATA CRUD OPERATIONS
 
+# Reading fields compared when a seq is replayed
+READING_FIELDS = ("temperature", "pressure", "humidity", "wind_speed", "wind_direction", "uv_index", "is_raining")
+
+
+def _check_replay(received_data: schemas.DataCreate, stored):
+    """
+    A replayed seq must carry the same reading. A different payload means
+    the client reused the seq (e.g. its counter reset), which is rejected
+    rather than silently answered with the old reading.
+    """
+    if any(getattr(received_data, f) != getattr(stored, f) for f in READING_FIELDS):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Sequence number {received_data.seq} was already used for a different reading."
+        )
+
 # CREATE DATA 
-@router.post("/data", status_code=status.HTTP_201_CREATED, response_model=schemas.DataOut)
+@router.post("/data", status_code=status.HTTP_201_CREATED, response_model=schemas.DataIngestOut, dependencies=[Depends(ratelimit.limit_ingest)])
 def create_data(
     received_data: schemas.DataCreate,
     auth_station: schemas.StationData = Depends(oauth2.authenticate_station),
@@ -271,13 +394,31 @@ def create_data(
 ):
     """
     Create or update weather data for authenticated station.
+
+    Readings may carry a client sequence number (`seq`), unique for the
+    station's whole lifetime. A replayed `seq` returns the originally stored
+    reading instead of inserting a duplicate; a `seq` reused for a different
+    reading is rejected with 409.
+    New readings update the station's rolling statistics and are flagged
+    with any metrics that fall outside the expected bounds.
     """
+    station_id = auth_station.station_id
+    # The key is genuine, give it its own rate limit bucket
+    ratelimit.ingest_limiter.admit(auth_station.api_access_key)
+
+    if received_data.seq is not None:
+        replayed = dedupe.ingest_window.get(station_id, received_data.seq)
+        if replayed:
+            _check_replay(received_data, replayed)
+            return replayed
+
+    anomalies = []
+
     try:
-        from datetime import datetime
         current_time = datetime.utcnow()
         
         # Update station attributes including last_updated timestamp
-        stn = db.query(models.Station).filter(models.Station.station_id == auth_station.station_id)
+        stn = db.query(models.Station).filter(models.Station.station_id == station_id)
         stn.update(
             {
                 "location": received_data.location,
@@ -292,12 +433,15 @@ def create_data(
             },
             synchronize_session=False
         )
-        db.commit()
 
-        # Create a new data record
+        # Rolling statistics, updated in the same transaction as the insert
+        anomalies = stats.update_station_stats(db, station_id, received_data)
+
+        # Create a new data record, committed together with the station update
         cleaned_received_data = models.Data(
-            station_id=auth_station.station_id,
+            station_id=station_id,
             location=auth_station.location,
+            seq=received_data.seq,
             temperature=received_data.temperature,
             pressure=received_data.pressure,
             humidity=received_data.humidity,
@@ -310,7 +454,24 @@ def create_data(
         db.commit()
         db.refresh(cleaned_received_data)
 
-        return cleaned_received_data
+    except IntegrityError:
+        db.rollback()
+        anomalies = []
+        # Replay that fell outside the dedupe window, return the stored reading.
+        # Without a seq the violation is something else (e.g. station deleted).
+        cleaned_received_data = None
+        if received_data.seq is not None:
+            cleaned_received_data = (
+                db.query(models.Data)
+                .filter(models.Data.station_id == station_id, models.Data.seq == received_data.seq)
+                .first()
+            )
+        if not cleaned_received_data:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Conflicting data record."
+            )
+        _check_replay(received_data, cleaned_received_data)
 
     except Exception as e:
         db.rollback()
@@ -319,21 +480,43 @@ def create_data(
             detail=f"An error occurred while processing the request: {str(e)}"
         )
 
-# GET HISTORICAL DATA
-from datetime import datetime, timedelta
+    result = schemas.DataIngestOut.model_validate(cleaned_received_data)
+    result.anomalies = anomalies
+    if received_data.seq is not None:
+        dedupe.ingest_window.add(station_id, received_data.seq, result)
+    return result
 
-@router.get("/{station_id}/historical_data", response_model=List[schemas.DataOut])
+# GET HISTORICAL DATA
+@router.get(
+    "/{station_id}/historical_data",
+    response_model=List[schemas.DataOut],
+    dependencies=[Depends(ratelimit.limit_reads)],
+    responses={200: {"content": {COLUMNS_MEDIA_TYPE: {"schema": schemas.DataColumns.model_json_schema()}}}},
+)
 def get_historical_data(
     station_id: int,
+    response: Response,
     start_time: Optional[str] = Query(None, description="Start time for filtering (ISO format)"),
     end_time: Optional[str] = Query(None, description="End time for filtering (ISO format)"),
+    since: Optional[int] = Query(None, ge=0, description="Cursor (last data_id seen); returns only newer records"),
+    format: Optional[str] = Query(None, pattern="^(rows|columns)$", description="Response format: 'rows' (default) or 'columns'"),
+    delta: bool = Query(False, description="Delta-encode timestamps in the 'columns' format"),
+    accept: Optional[str] = Header(None),
     auth: schemas.User = Depends(oauth2.get_current_user_optional),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Retrieve historical weather data for a specific station.
     If no time filters are provided, returns data from the last 24 hours
     relative to the most recent record.
+
+    If `since` is provided, only records newer than that cursor are returned
+    (possibly none), still limited to the last 24 hours unless `start_time`
+    is given. The cursor for the next request is sent back in the
+    `X-Data-Cursor` response header.
+
+    With `format=columns` (or `Accept: application/vnd.wapi.columns+json`)
+    the data is returned as one array per metric with epoch-ms timestamps.
     """
     # Ensure station exists
     station = db.query(models.Station).filter(models.Station.station_id == station_id).first()
@@ -355,6 +538,31 @@ def get_historical_data(
                 detail="You are not authorized to access this station's data."
             )
 
+    # Incremental fetch: only records the client has not seen yet
+    if since is not None:
+        query = db.query(models.Data).filter(models.Data.station_id == station_id, models.Data.data_id > since)
+        if start_time:
+            query = query.filter(models.Data.created_at >= datetime.fromisoformat(start_time))
+        else:
+            # Same 24 hour window as the default view, so a stale or zero
+            # cursor can never pull the station's whole history
+            latest_record = (
+                db.query(models.Data)
+                .filter(models.Data.station_id == station_id)
+                .order_by(models.Data.created_at.desc())
+                .first()
+            )
+            if not latest_record or latest_record.data_id <= since:
+                _set_cursor(response, [], since)
+                return _render_data([], response, format, accept, delta)
+            query = query.filter(models.Data.created_at >= latest_record.created_at - timedelta(hours=24))
+        if end_time:
+            query = query.filter(models.Data.created_at <= datetime.fromisoformat(end_time))
+
+        new_data = query.order_by(models.Data.created_at.asc(), models.Data.data_id.asc()).all()
+        _set_cursor(response, new_data, since)
+        return _render_data(new_data, response, format, accept, delta)
+
     # Determine default time range if no filters provided
     if not start_time and not end_time:
         latest_record = (
@@ -391,4 +599,5 @@ def get_historical_data(
             detail="No historical data found for the given filters."
         )
 
-    return historical_data
+    _set_cursor(response, historical_data)
+    return _render_data(historical_data, response, format, accept, delta)
@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Session
 from fastapi import Depends, FastAPI, Response, status, HTTPException, APIRouter
-from .. import models, schemas, utils, oauth2
+from .. import models, schemas, utils, oauth2, ratelimit
 from ..database import get_db
 
 router = APIRouter( prefix="/users", tags=['User'])
@@ -31,7 +31,7 @@ def create_user(
 
 
 ###### Get All Users
-@router.get("/", status_code = status.HTTP_200_OK, response_model=list[schemas.User])
+@router.get("/", status_code = status.HTTP_200_OK, response_model=list[schemas.User], dependencies=[Depends(ratelimit.limit_reads)])
 def get_users_all(
     auth = Depends(oauth2.get_current_user),
     db: Session = Depends(get_db)
@@ -45,7 +45,7 @@ def get_users_all(
 
 
 ###### Get User by id
-@router.get("/me", status_code = status.HTTP_200_OK, response_model=schemas.User)
+@router.get("/me", status_code = status.HTTP_200_OK, response_model=schemas.User, dependencies=[Depends(ratelimit.limit_reads)])
 def get_user(
     # id: int,
     auth = Depends(oauth2.get_current_user),
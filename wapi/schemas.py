@@ -4,7 +4,7 @@ from pydantic import BaseModel, EmailStr
 from pydantic.types import conint
 
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, EmailStr
 from pydantic.types import conint
 
@@ -61,6 +61,10 @@ class DataCreate(BaseModel):
     humidity: float
     uv_index: float
     is_raining: bool
+    # Optional client sequence number for idempotent retries. It must be unique
+    # for the station's whole lifetime (e.g. a timestamp or a persisted
+    # counter), not reset on reboot: a reused seq with a new reading gets 409.
+    seq: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -73,11 +77,47 @@ class DataOut(BaseModel):
     humidity: float
     uv_index: float
     is_raining: bool
+    seq: Optional[int] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+class DataIngestOut(DataOut):
+    # Metrics that fell outside the station's expected bounds
+    anomalies: List[str] = []
+
+class MetricStats(BaseModel):
+    count: int
+    mean: float
+    std: float
+    min: Optional[float] = None
+    max: Optional[float] = None
+    ewma: Optional[float] = None
+    trend: float
+
+class StationStats(BaseModel):
+    station_id: int
+    window: int
+    metrics: Dict[str, MetricStats]
+    last_anomalies: List[str]
+
+class DataColumns(BaseModel):
+    """
+    Column-oriented time series: one array per metric, aligned by index.
+    `created_at` holds epoch milliseconds, delta-encoded when `delta` is true
+    (first value absolute, the rest differences from the previous one).
+    """
+    delta: bool = False
+    created_at: List[int]
+    wind_speed: List[float]
+    wind_direction: List[str]
+    temperature: List[float]
+    pressure: List[float]
+    humidity: List[float]
+    uv_index: List[float]
+    is_raining: List[bool]
+
 class StationData(DataOut):
     station_id: int
     location: str
@@ -0,0 +1,112 @@
+import math
+from typing import List
+
+from sqlalchemy.orm import Session
+
+from . import models
+from .config import settings
+
+# Numeric Data columns tracked per station
+METRICS = ("temperature", "pressure", "humidity", "wind_speed", "uv_index")
+
+
+def _std(row: models.StationStat) -> float:
+    return math.sqrt(max(row.var, 0.0))
+
+
+def is_anomaly(row: models.StationStat, x: float) -> bool:
+    """
+    True if `x` is further than the configured number of standard
+    deviations from the current mean. Checked before `x` is added.
+    """
+    if row.count < settings.anomaly_min_samples:
+        return False
+    std = _std(row)
+    return std > 0 and abs(x - row.mean) > settings.anomaly_threshold * std
+
+
+def add_value(row: models.StationStat, x: float):
+    """
+    Fold one value into the stats row in O(1).
+
+    Mean/variance use an exponentially weighted Welford update with
+    alpha = 2 / (stats_window + 1). Until `stats_window` values have been
+    seen alpha is 1/count, which is the plain cumulative Welford update.
+    The trend is an EWMA of successive differences of the smoothed value.
+    """
+    row.count += 1
+    alpha = max(2 / (settings.stats_window + 1), 1 / row.count)
+    diff = x - row.mean
+    increment = alpha * diff
+    row.mean += increment
+    row.var = (1 - alpha) * (row.var + diff * increment)
+
+    row.min = x if row.min is None else min(row.min, x)
+    row.max = x if row.max is None else max(row.max, x)
+
+    if row.ewma is None:
+        row.ewma = x
+    else:
+        previous = row.ewma
+        row.ewma += settings.stats_ewma_alpha * (x - row.ewma)
+        row.trend += settings.stats_ewma_alpha * ((row.ewma - previous) - row.trend)
+
+
+def update_station_stats(db: Session, station_id: int, reading) -> List[str]:
+    """
+    Update the station's stats rows with a new reading and return the names
+    of metrics flagged as anomalous. Does not commit: the caller commits it
+    in the same transaction as the data insert, so every worker sees the
+    same aggregates.
+
+    The first time a station is seen, its rows are seeded from the latest
+    `stats_window` stored readings.
+    """
+    rows = {
+        row.metric: row
+        for row in db.query(models.StationStat).filter(models.StationStat.station_id == station_id).with_for_update()
+    }
+    if not rows:
+        rows = {m: models.StationStat(station_id=station_id, metric=m, count=0, mean=0.0, var=0.0, trend=0.0) for m in METRICS}
+        recent = (
+            db.query(models.Data)
+            .filter(models.Data.station_id == station_id)
+            .order_by(models.Data.created_at.desc(), models.Data.data_id.desc())
+            .limit(settings.stats_window)
+            .all()
+        )
+        for old in reversed(recent):
+            for name, row in rows.items():
+                add_value(row, getattr(old, name))
+        db.add_all(rows.values())
+
+    anomalies = []
+    for name in METRICS:
+        row = rows[name]
+        value = getattr(reading, name)
+        row.anomalous = is_anomaly(row, value)
+        if row.anomalous:
+            anomalies.append(name)
+        add_value(row, value)
+    return anomalies
+
+
+def get_station_summary(db: Session, station_id: int) -> dict:
+    rows = db.query(models.StationStat).filter(models.StationStat.station_id == station_id).all()
+    return {
+        "station_id": station_id,
+        "window": settings.stats_window,
+        "metrics": {
+            row.metric: {
+                "count": row.count,
+                "mean": row.mean,
+                "std": _std(row),
+                "min": row.min,
+                "max": row.max,
+                "ewma": row.ewma,
+                "trend": row.trend,
+            }
+            for row in rows
+        },
+        "last_anomalies": [row.metric for row in rows if row.anomalous],
+    }